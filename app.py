@@ -2,33 +2,44 @@ import sys
 import subprocess
 import threading
 import time
+import queue
+import asyncio
 import os
+import shutil
+import tempfile
 import json
+import hashlib
+import types
 import streamlit.components.v1 as components
 from datetime import datetime, timedelta
 import urllib.parse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sqlite3
 from pathlib import Path
+from contextlib import contextmanager
 
-# Install required packages
+import streamlit as st
+import msgpack
+import numpy as np
+import pandas as pd
+import google.auth
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build, Resource
+from google_auth_oauthlib.flow import Flow
+
+# Optional faster SQLite binding for the bulk log insert path
 try:
-    import streamlit as st
+    import apsw
 except ImportError:
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "streamlit"])
-    import streamlit as st
+    apsw = None
 
+# Optional async file I/O (libaio on Linux) for writing uploaded videos
 try:
-    import google.auth
-    from google.oauth2.credentials import Credentials
-    from googleapiclient.discovery import build
-    from google_auth_oauthlib.flow import Flow
+    from aiofile import AIOFile
 except ImportError:
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "google-auth", "google-auth-oauthlib", "google-api-python-client"])
-    import google.auth
-    from google.oauth2.credentials import Credentials
-    from googleapiclient.discovery import build
-    from google_auth_oauthlib.flow import Flow
+    AIOFile = None
 
 # Predefined OAuth configuration
 PREDEFINED_OAUTH_CONFIG = {
@@ -43,113 +54,397 @@ PREDEFINED_OAUTH_CONFIG = {
     }
 }
 
+SCOPES = ['https://www.googleapis.com/auth/youtube.force-ssl']
+SCOPES_QUOTED = urllib.parse.quote(' '.join(SCOPES))
+
+@st.cache_resource(show_spinner=False)
+def _http_session():
+    """Keep-alive HTTP session so OAuth token requests reuse one TLS connection across reruns"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+    ))
+    return session
+
+DB_PATH = "streaming_logs.db"
+
+# SQL used by the helpers below; keeping each text identical lets sqlite3's
+# statement cache reuse the compiled statement on every call
+_SQL_INSERT_LOG = '''
+    INSERT INTO streaming_logs 
+    (timestamp, session_id, log_type, message, video_file, stream_key, channel_name)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_INSERT_SESSION = '''
+    INSERT OR REPLACE INTO streaming_sessions 
+    (session_id, start_time, video_file, stream_title, stream_description, tags, category, privacy_status, made_for_kids, channel_name)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_UPSERT_CHANNEL = '''
+    INSERT OR REPLACE INTO saved_channels 
+    (channel_name, channel_id, auth_data, created_at, last_used)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+_SQL_SELECT_CHANNELS = '''
+    SELECT channel_name, channel_id, auth_data, last_used
+    FROM saved_channels 
+    ORDER BY last_used DESC
+'''
+
+_SQL_UPDATE_CHANNEL_LAST_USED = '''
+    UPDATE saved_channels 
+    SET last_used = ?
+    WHERE channel_name = ?
+'''
+
+_SQL_SELECT_LOGS_BY_SESSION = '''
+    SELECT timestamp, log_type, message, video_file, channel_name
+    FROM streaming_logs 
+    WHERE session_id = ?
+    ORDER BY timestamp DESC 
+    LIMIT ?
+'''
+
+_SQL_SELECT_LOGS = '''
+    SELECT timestamp, log_type, message, video_file, channel_name
+    FROM streaming_logs 
+    ORDER BY timestamp DESC 
+    LIMIT ?
+'''
+
+_SQL_SELECT_LOGS_BY_TYPE = '''
+    SELECT timestamp, log_type, message, video_file, channel_name
+    FROM streaming_logs 
+    WHERE log_type = ?
+    ORDER BY timestamp DESC 
+    LIMIT ?
+'''
+
+_SQL_SELECT_LOGS_BY_SESSION_AND_TYPE = '''
+    SELECT timestamp, log_type, message, video_file, channel_name
+    FROM streaming_logs 
+    WHERE session_id = ? AND log_type = ?
+    ORDER BY timestamp DESC 
+    LIMIT ?
+'''
+
+# Per-connection tuning, applied in one call whenever a connection is opened
+_CONN_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-64000;
+    PRAGMA mmap_size=268435456;
+    PRAGMA wal_autocheckpoint=10000;
+"""
+
+def _open_conn(read_only=False):
+    """Open a SQLite connection with per-connection tuning PRAGMAs applied"""
+    if read_only:
+        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False, cached_statements=256)
+    else:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    conn.executescript(_CONN_PRAGMAS)
+    return conn
+
+def _open_apsw_conn():
+    """Open an apsw connection with the same tuning PRAGMAs as _open_conn"""
+    conn = apsw.Connection(DB_PATH)
+    conn.setbusytimeout(5000)
+    # apsw steps through multi-statement strings lazily; fetchall() runs them all
+    conn.execute(_CONN_PRAGMAS).fetchall()
+    return conn
+
+class ConnectionPool:
+    """Bounded pool of read-only SQLite connections"""
+    
+    def __init__(self, min_size=2, max_size=8, idle_timeout=300):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._size = 0
+        for _ in range(min_size):
+            self._idle.put((self._create(), time.monotonic()))
+    
+    def _create(self):
+        with self._lock:
+            if self._size >= self.max_size:
+                return None
+            self._size += 1
+        try:
+            return _open_conn(read_only=True)
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+    
+    def _discard(self, conn):
+        with self._lock:
+            self._size -= 1
+        conn.close()
+    
+    def acquire(self):
+        """Take an idle connection, open a new one below max_size, or wait for a release"""
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - last_used > self.idle_timeout and self._size > self.min_size:
+                self._discard(conn)
+                continue
+            try:
+                conn.execute("SELECT 1").fetchone()
+                return conn
+            except sqlite3.Error:
+                self._discard(conn)
+        
+        conn = self._create()
+        if conn is None:
+            conn, _ = self._idle.get()
+        return conn
+    
+    def release(self, conn):
+        self._idle.put((conn, time.monotonic()))
+
+class Database:
+    """Process-wide SQLite state, opened once by _ensure_schema and shared across reruns"""
+    
+    def __init__(self):
+        # One shared writer connection guarded by a lock (SQLite admits a single writer at a
+        # time anyway), plus a pool of read-only connections so readers run concurrently
+        self.conn = None
+        self.lock = threading.Lock()
+        self.read_pool = None
+        # apsw connection used by _insert_log_many when apsw is installed; shares lock
+        self.apsw_conn = None
+
+@contextmanager
+def get_connection():
+    """Borrow a read-only connection from the pool for the duration of the block"""
+    pool = _database().read_pool
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
 # Initialize database for persistent logs
-def init_database():
+def init_database(db):
     """Initialize SQLite database for persistent logs"""
     try:
-        db_path = Path("streaming_logs.db")
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Create logs table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS streaming_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                session_id TEXT NOT NULL,
-                log_type TEXT NOT NULL,
-                message TEXT NOT NULL,
-                video_file TEXT,
-                stream_key TEXT,
-                channel_name TEXT
-            )
-        ''')
-        
-        # Create streaming_sessions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS streaming_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT UNIQUE NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT,
-                video_file TEXT,
-                stream_title TEXT,
-                stream_description TEXT,
-                tags TEXT,
-                category TEXT,
-                privacy_status TEXT,
-                made_for_kids BOOLEAN,
-                channel_name TEXT,
-                status TEXT DEFAULT 'active'
-            )
-        ''')
-        
-        # Create saved_channels table for persistent authentication
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS saved_channels (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                channel_name TEXT UNIQUE NOT NULL,
-                channel_id TEXT NOT NULL,
-                auth_data TEXT NOT NULL,
-                created_at TEXT NOT NULL,
-                last_used TEXT NOT NULL
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with db.lock:
+            first_open = db.conn is None
+            if first_open:
+                db.conn = _open_conn()
+            cursor = db.conn.cursor()
+            
+            # page_size only takes effect before the first write to a new database
+            cursor.execute("PRAGMA page_size=8192")
+            # WAL persists in the database file, so every later connection uses it
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
+            # Older databases stored log timestamps as ISO text; move them aside for migration
+            cursor.execute("PRAGMA table_info(streaming_logs)")
+            migrate_logs = any(row[1] == 'timestamp' and row[2] == 'TEXT' for row in cursor.fetchall())
+            if migrate_logs:
+                cursor.execute("BEGIN")
+                cursor.execute("ALTER TABLE streaming_logs RENAME TO streaming_logs_old")
+            
+            # Create logs table (timestamp is unix seconds)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS streaming_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp REAL NOT NULL,
+                    session_id TEXT NOT NULL,
+                    log_type TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    video_file TEXT,
+                    stream_key TEXT,
+                    channel_name TEXT
+                )
+            ''')
+            
+            if migrate_logs:
+                # ISO timestamps were written with datetime.now(), i.e. local time
+                cursor.execute('''
+                    INSERT INTO streaming_logs
+                    (id, timestamp, session_id, log_type, message, video_file, stream_key, channel_name)
+                    SELECT id, (julianday(timestamp, 'utc') - 2440587.5) * 86400.0,
+                           session_id, log_type, message, video_file, stream_key, channel_name
+                    FROM streaming_logs_old
+                ''')
+                cursor.execute("DROP TABLE streaming_logs_old")
+                db.conn.commit()
+            
+            # Indexes for the "latest logs" queries, with and without a session filter
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_logs_session_ts
+                ON streaming_logs (session_id, timestamp DESC)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_logs_ts
+                ON streaming_logs (timestamp DESC)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_logs_type_ts
+                ON streaming_logs (log_type, timestamp DESC)
+            ''')
+            
+            # Create streaming_sessions table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS streaming_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT UNIQUE NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    video_file TEXT,
+                    stream_title TEXT,
+                    stream_description TEXT,
+                    tags TEXT,
+                    category TEXT,
+                    privacy_status TEXT,
+                    made_for_kids BOOLEAN,
+                    channel_name TEXT,
+                    status TEXT DEFAULT 'active'
+                )
+            ''')
+            
+            # Older databases stored auth_data as JSON text; move them aside for migration
+            cursor.execute("PRAGMA table_info(saved_channels)")
+            migrate_channels = any(row[1] == 'auth_data' and row[2] == 'TEXT' for row in cursor.fetchall())
+            if migrate_channels:
+                cursor.execute("BEGIN")
+                cursor.execute("ALTER TABLE saved_channels RENAME TO saved_channels_old")
+            
+            # Create saved_channels table for persistent authentication (auth_data is msgpack)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS saved_channels (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel_name TEXT UNIQUE NOT NULL,
+                    channel_id TEXT NOT NULL,
+                    auth_data BLOB NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_used TEXT NOT NULL
+                )
+            ''')
+            
+            if migrate_channels:
+                cursor.execute("SELECT id, channel_name, channel_id, auth_data, created_at, last_used FROM saved_channels_old")
+                rows = [
+                    (row_id, name, channel_id, msgpack.packb(json.loads(auth_data), use_bin_type=True), created_at, last_used)
+                    for row_id, name, channel_id, auth_data, created_at, last_used in cursor.fetchall()
+                ]
+                cursor.executemany('''
+                    INSERT INTO saved_channels
+                    (id, channel_name, channel_id, auth_data, created_at, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+                cursor.execute("DROP TABLE saved_channels_old")
+                db.conn.commit()
+            
+            db.conn.commit()
+            
+            # Refresh planner statistics once per process so the indexes get picked
+            if first_open:
+                cursor.execute("ANALYZE")
+                db.conn.commit()
+                if apsw is not None:
+                    db.apsw_conn = _open_apsw_conn()
+        
+        # Read-only connections can only be opened once the file and schema exist
+        with db.lock:
+            if db.read_pool is None:
+                db.read_pool = ConnectionPool()
+        return True
     except Exception as e:
         st.error(f"Database initialization error: {e}")
+        return False
+
+@st.cache_resource(show_spinner=False)
+def _ensure_schema():
+    """Open the database and run init_database once per process instead of on every rerun"""
+    db = Database()
+    return db if init_database(db) else None
+
+def _database():
+    """The process-wide Database; module globals are reset on every Streamlit rerun"""
+    return _ensure_schema()
 
 def save_channel_auth(channel_name, channel_id, auth_data):
     """Save channel authentication data persistently"""
     try:
-        conn = sqlite3.connect("streaming_logs.db")
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO saved_channels 
-            (channel_name, channel_id, auth_data, created_at, last_used)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            channel_name,
-            channel_id,
-            json.dumps(auth_data),
-            datetime.now().isoformat(),
-            datetime.now().isoformat()
-        ))
-        
-        conn.commit()
-        conn.close()
+        db = _database()
+        with db.lock:
+            cursor = db.conn.cursor()
+            
+            cursor.execute(_SQL_UPSERT_CHANNEL, (
+                channel_name,
+                channel_id,
+                msgpack.packb(auth_data, use_bin_type=True),
+                datetime.now().isoformat(),
+                datetime.now().isoformat()
+            ))
+            
+            db.conn.commit()
+        _query_saved_channels.clear()
+        _fetch_channel_info.clear()
         return True
     except Exception as e:
         st.error(f"Error saving channel auth: {e}")
         return False
 
-def load_saved_channels():
-    """Load saved channel authentication data"""
+def save_channels_bulk(channels):
+    """Save authentication data for several channels in one transaction"""
     try:
-        conn = sqlite3.connect("streaming_logs.db")
+        now = datetime.now().isoformat()
+        rows = [
+            (c['name'], c.get('id', ''), msgpack.packb(c['auth'], use_bin_type=True), now, now)
+            for c in channels
+        ]
+        db = _database()
+        with db.lock:
+            cursor = db.conn.cursor()
+            cursor.executemany(_SQL_UPSERT_CHANNEL, rows)
+            db.conn.commit()
+        _query_saved_channels.clear()
+        return True
+    except Exception as e:
+        st.error(f"Error saving channels: {e}")
+        return False
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _query_saved_channels():
+    """Query saved channels, cached until the next save/update"""
+    with get_connection() as conn:
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT channel_name, channel_id, auth_data, last_used
-            FROM saved_channels 
-            ORDER BY last_used DESC
-        ''')
-        
-        channels = []
-        for row in cursor.fetchall():
-            channel_name, channel_id, auth_data, last_used = row
-            channels.append({
-                'name': channel_name,
-                'id': channel_id,
-                'auth': json.loads(auth_data),
-                'last_used': last_used
-            })
-        
-        conn.close()
-        return channels
+        cursor.execute(_SQL_SELECT_CHANNELS)
+        rows = cursor.fetchall()
+    
+    # auth_data is kept as packed bytes and only unpacked when the channel is used
+    channels = []
+    for row in rows:
+        channel_name, channel_id, auth_data, last_used = row
+        channels.append({
+            'name': channel_name,
+            'id': channel_id,
+            'auth_data': auth_data,
+            'last_used': last_used
+        })
+    
+    return channels
+
+def load_saved_channels():
+    """Load saved channel authentication data"""
+    try:
+        return _query_saved_channels()
     except Exception as e:
         st.error(f"Error loading saved channels: {e}")
         return []
@@ -157,102 +452,249 @@ def load_saved_channels():
 def update_channel_last_used(channel_name):
     """Update last used timestamp for a channel"""
     try:
-        conn = sqlite3.connect("streaming_logs.db")
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE saved_channels 
-            SET last_used = ?
-            WHERE channel_name = ?
-        ''', (datetime.now().isoformat(), channel_name))
-        
-        conn.commit()
-        conn.close()
+        db = _database()
+        with db.lock:
+            cursor = db.conn.cursor()
+            
+            cursor.execute(_SQL_UPDATE_CHANNEL_LAST_USED, (datetime.now().isoformat(), channel_name))
+            
+            db.conn.commit()
+        _query_saved_channels.clear()
     except Exception as e:
         st.error(f"Error updating channel last used: {e}")
 
 def log_to_database(session_id, log_type, message, video_file=None, stream_key=None, channel_name=None):
     """Log message to database"""
     try:
-        conn = sqlite3.connect("streaming_logs.db")
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO streaming_logs 
-            (timestamp, session_id, log_type, message, video_file, stream_key, channel_name)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            datetime.now().isoformat(),
-            session_id,
-            log_type,
-            message,
-            video_file,
-            stream_key,
-            channel_name
-        ))
-        
-        conn.commit()
-        conn.close()
+        db = _database()
+        with db.lock:
+            cursor = db.conn.cursor()
+            
+            cursor.execute(_SQL_INSERT_LOG, (
+                time.time(),
+                session_id,
+                log_type,
+                message,
+                video_file,
+                stream_key,
+                channel_name
+            ))
+            
+            db.conn.commit()
     except Exception as e:
         st.error(f"Error logging to database: {e}")
 
-def get_logs_from_database(session_id=None, limit=100):
-    """Get logs from database"""
+def _insert_log_many(db, rows):
+    """Insert log rows in one transaction, through apsw when it is installed"""
+    if db.apsw_conn is not None:
+        with db.apsw_conn:
+            db.apsw_conn.cursor().executemany(_SQL_INSERT_LOG, rows)
+    else:
+        db.conn.cursor().executemany(_SQL_INSERT_LOG, rows)
+        db.conn.commit()
+
+def log_many_to_database(rows):
+    """Insert a batch of log rows to database in a single transaction"""
+    if not rows:
+        return
     try:
-        conn = sqlite3.connect("streaming_logs.db")
-        cursor = conn.cursor()
-        
-        if session_id:
-            cursor.execute('''
-                SELECT timestamp, log_type, message, video_file, channel_name
-                FROM streaming_logs 
-                WHERE session_id = ?
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            ''', (session_id, limit))
-        else:
-            cursor.execute('''
-                SELECT timestamp, log_type, message, video_file, channel_name
-                FROM streaming_logs 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            ''', (limit,))
-        
-        logs = cursor.fetchall()
-        conn.close()
+        db = _database()
+        with db.lock:
+            _insert_log_many(db, rows)
+    except Exception as e:
+        st.error(f"Error logging to database: {e}")
+
+class LogBuffer:
+    """Collect log rows in memory and write them to database in batches"""
+    
+    def __init__(self, max_rows=200, max_age=0.5):
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.rows = []
+        self.last_flush = time.monotonic()
+    
+    def append(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.max_rows or time.monotonic() - self.last_flush >= self.max_age:
+            self.flush()
+    
+    def flush(self):
+        rows, self.rows = self.rows, []
+        self.last_flush = time.monotonic()
+        log_many_to_database(rows)
+
+def _drain_log_queue(log_queue):
+    """Write rows from log_queue to database in batches; runs as a daemon for the life of the process"""
+    log_buffer = LogBuffer(max_rows=500, max_age=0.25)
+    while True:
+        try:
+            row = log_queue.get(timeout=0.25)
+        except queue.Empty:
+            log_buffer.flush()
+            continue
+        log_buffer.append(row)
+
+@st.cache_resource(show_spinner=False)
+def _log_queue():
+    """Process-wide queue of log rows, drained into database in batches by one flusher thread"""
+    log_queue = queue.Queue(maxsize=10000)
+    threading.Thread(target=_drain_log_queue, args=(log_queue,), daemon=True).start()
+    return log_queue
+
+class LogRing:
+    """Fixed-capacity ring of live log lines stored as parallel arrays"""
+    
+    def __init__(self, capacity=4096, max_bytes=1 << 20):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.ts = np.empty(capacity, dtype='int64')
+        self.msg_start = np.empty(capacity, dtype='int64')
+        self.msg_len = np.empty(capacity, dtype='int64')
+        self.msg_bytes = bytearray()
+        self.head = 0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return self.count
+    
+    def append(self, msg, ts=None):
+        data = msg.encode('utf-8')
+        with self._lock:
+            if len(self.msg_bytes) + len(data) > self.max_bytes:
+                self._compact()
+            i = self.head
+            self.ts[i] = int(time.time()) if ts is None else ts
+            self.msg_start[i] = len(self.msg_bytes)
+            self.msg_len[i] = len(data)
+            self.msg_bytes += data
+            self.head = (i + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+    
+    def clear(self):
+        with self._lock:
+            self.msg_bytes = bytearray()
+            self.head = 0
+            self.count = 0
+    
+    def _slots(self, n):
+        n = min(n, self.count)
+        return [(self.head - n + k) % self.capacity for k in range(n)]
+    
+    def _compact(self):
+        # Drop the bytes of overwritten entries by copying the live ones to a new buffer
+        buf = bytearray()
+        for i in self._slots(self.count):
+            start = int(self.msg_start[i])
+            self.msg_start[i] = len(buf)
+            buf += self.msg_bytes[start:start + int(self.msg_len[i])]
+        self.msg_bytes = buf
+        # Keep compaction amortized O(1) even when live messages alone approach max_bytes
+        self.max_bytes = max(self.max_bytes, 2 * len(buf))
+    
+    def tail(self, n):
+        """Return the last n entries formatted as "[HH:MM:SS] message" """
+        with self._lock:
+            lines = []
+            for i in self._slots(n):
+                start = int(self.msg_start[i])
+                msg = self.msg_bytes[start:start + int(self.msg_len[i])].decode('utf-8')
+                lines.append(f"[{time.strftime('%H:%M:%S', time.localtime(int(self.ts[i])))}] {msg}")
+            return lines
+
+def get_logs_from_database(session_id=None, limit=100, log_type=None):
+    """Get logs from database, optionally filtered by session and/or log type"""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            
+            if session_id and log_type:
+                cursor.execute(_SQL_SELECT_LOGS_BY_SESSION_AND_TYPE, (session_id, log_type, limit))
+            elif session_id:
+                cursor.execute(_SQL_SELECT_LOGS_BY_SESSION, (session_id, limit))
+            elif log_type:
+                cursor.execute(_SQL_SELECT_LOGS_BY_TYPE, (log_type, limit))
+            else:
+                cursor.execute(_SQL_SELECT_LOGS, (limit,))
+            
+            logs = cursor.fetchall()
         return logs
     except Exception as e:
         st.error(f"Error getting logs from database: {e}")
         return []
 
+@st.cache_data(ttl=2, show_spinner=False)
+def _cached_session_logs(session_id, limit, version):
+    """Session logs cached per live-log version, so reruns without new logs skip the query"""
+    return get_logs_from_database(session_id, limit)
+
+def format_log_timestamp(timestamp):
+    """Format a stored log timestamp (unix seconds) for display"""
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+def _build_export_blob():
+    """Latest 1000 logs formatted as export text; only called when a download is requested"""
+    rows = get_logs_from_database(limit=1000)
+    return "\n".join(f"[{format_log_timestamp(r[0])}] {r[1]}: {r[2]}" for r in rows).encode()
+
 def save_streaming_session(session_id, video_file, stream_title, stream_description, tags, category, privacy_status, made_for_kids, channel_name):
     """Save streaming session to database"""
     try:
-        conn = sqlite3.connect("streaming_logs.db")
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO streaming_sessions 
-            (session_id, start_time, video_file, stream_title, stream_description, tags, category, privacy_status, made_for_kids, channel_name)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            session_id,
-            datetime.now().isoformat(),
-            video_file,
-            stream_title,
-            stream_description,
-            tags,
-            category,
-            privacy_status,
-            made_for_kids,
-            channel_name
-        ))
-        
-        conn.commit()
-        conn.close()
+        db = _database()
+        with db.lock:
+            cursor = db.conn.cursor()
+            
+            cursor.execute(_SQL_INSERT_SESSION, (
+                session_id,
+                datetime.now().isoformat(),
+                video_file,
+                stream_title,
+                stream_description,
+                tags,
+                category,
+                privacy_status,
+                made_for_kids,
+                channel_name
+            ))
+            
+            db.conn.commit()
     except Exception as e:
         st.error(f"Error saving streaming session: {e}")
 
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.flv', '.avi', '.mov', '.mkv'})
+
+@st.cache_data(ttl=5, show_spinner=False)
+def list_video_files():
+    """List video files in the current directory, cached for a few seconds across reruns"""
+    with os.scandir('.') as entries:
+        return [
+            entry.name for entry in entries
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS
+        ]
+
+def _write_upload_aio(uploaded_file, path, chunk_size=1 << 20, batch=16):
+    """Write an uploaded file with batches of concurrent positional writes via aiofile"""
+    async def write_all(data):
+        async with AIOFile(path, 'wb') as afp:
+            offsets = range(0, len(data), chunk_size)
+            for i in range(0, len(offsets), batch):
+                await asyncio.gather(*(
+                    afp.write(bytes(data[offset:offset + chunk_size]), offset=offset)
+                    for offset in offsets[i:i + batch]
+                ))
+            await afp.fsync()
+    
+    with uploaded_file.getbuffer() as data:
+        asyncio.run(write_all(data))
+
+def save_uploaded_file(uploaded_file, path):
+    """Persist an uploaded file, using aiofile on Linux when enabled and installed"""
+    if AIOFile is not None and sys.platform.startswith('linux') and st.session_state.get('use_aio_upload'):
+        _write_upload_aio(uploaded_file, path)
+    else:
+        with open(path, "wb") as f:
+            shutil.copyfileobj(uploaded_file, f, length=1 << 20)
+
 def load_google_oauth_config(json_file):
     """Load Google OAuth configuration from downloaded JSON file"""
     try:
@@ -268,20 +710,26 @@ def load_google_oauth_config(json_file):
         st.error(f"Error loading Google OAuth JSON: {e}")
         return None
 
+@st.cache_data(show_spinner=False)
+def _build_auth_url(auth_uri, client_id, redirect_uri):
+    """Build OAuth authorization URL, cached per client and redirect URI"""
+    return (
+        f"{auth_uri}?"
+        f"client_id={client_id}&"
+        f"redirect_uri={urllib.parse.quote(redirect_uri)}&"
+        f"scope={SCOPES_QUOTED}&"
+        f"response_type=code&"
+        f"access_type=offline&"
+        f"prompt=consent"
+    )
+
 def generate_auth_url(client_config):
     """Generate OAuth authorization URL"""
     try:
-        scopes = ['https://www.googleapis.com/auth/youtube.force-ssl']
-        
-        # Create authorization URL
-        auth_url = (
-            f"{client_config['auth_uri']}?"
-            f"client_id={client_config['client_id']}&"
-            f"redirect_uri={urllib.parse.quote(client_config['redirect_uris'][0])}&"
-            f"scope={urllib.parse.quote(' '.join(scopes))}&"
-            f"response_type=code&"
-            f"access_type=offline&"
-            f"prompt=consent"
+        auth_url = _build_auth_url(
+            client_config['auth_uri'],
+            client_config['client_id'],
+            client_config['redirect_uris'][0]
         )
         return auth_url
     except Exception as e:
@@ -299,7 +747,7 @@ def exchange_code_for_tokens(client_config, auth_code):
             'redirect_uri': client_config['redirect_uris'][0]
         }
         
-        response = requests.post(client_config['token_uri'], data=token_data)
+        response = _http_session().post(client_config['token_uri'], data=token_data, timeout=(3.05, 10))
         
         if response.status_code == 200:
             tokens = response.json()
@@ -338,21 +786,28 @@ def validate_channel_config(config):
     
     return True, "Valid configuration"
 
+# Session-scoped: the service's httplib2.Http is not thread-safe, and each session runs on its own thread
+@st.cache_resource(show_spinner=False, scope="session")
+def _build_youtube_service(credentials_dict):
+    """Build and cache one YouTube API service per session and set of credentials"""
+    if 'token' in credentials_dict:
+        credentials = Credentials.from_authorized_user_info(credentials_dict)
+    else:
+        credentials = Credentials(
+            token=credentials_dict.get('access_token'),
+            refresh_token=credentials_dict.get('refresh_token'),
+            token_uri=credentials_dict.get('token_uri', 'https://oauth2.googleapis.com/token'),
+            client_id=credentials_dict.get('client_id'),
+            client_secret=credentials_dict.get('client_secret'),
+            scopes=SCOPES
+        )
+    # Use the discovery document bundled with googleapiclient instead of fetching it
+    return build('youtube', 'v3', credentials=credentials, static_discovery=True)
+
 def create_youtube_service(credentials_dict):
     """Create YouTube API service from credentials"""
     try:
-        if 'token' in credentials_dict:
-            credentials = Credentials.from_authorized_user_info(credentials_dict)
-        else:
-            credentials = Credentials(
-                token=credentials_dict.get('access_token'),
-                refresh_token=credentials_dict.get('refresh_token'),
-                token_uri=credentials_dict.get('token_uri', 'https://oauth2.googleapis.com/token'),
-                client_id=credentials_dict.get('client_id'),
-                client_secret=credentials_dict.get('client_secret'),
-                scopes=['https://www.googleapis.com/auth/youtube.force-ssl']
-            )
-        service = build('youtube', 'v3', credentials=credentials)
+        service = _build_youtube_service(credentials_dict)
         return service
     except Exception as e:
         st.error(f"Error creating YouTube service: {e}")
@@ -386,22 +841,38 @@ def get_stream_key_only(service):
         st.error(f"Error getting stream key: {e}")
         return None
 
+def _service_token(service):
+    """Access token of a YouTube service, or None before the credentials have one"""
+    credentials = getattr(getattr(service, '_http', None), 'credentials', None)
+    return getattr(credentials, 'token', None)
+
+def _service_cache_key(service):
+    """Cache key for a YouTube service: SHA-1 of its access token"""
+    return hashlib.sha1(_service_token(service).encode()).hexdigest()
+
+@st.cache_data(ttl=300, show_spinner=False, hash_funcs={Resource: _service_cache_key})
+def _fetch_channel_info(service, channel_id=None):
+    """Fetch channel information from YouTube API, cached for 5 minutes"""
+    if channel_id:
+        request = service.channels().list(
+            part="snippet,statistics",
+            id=channel_id
+        )
+    else:
+        request = service.channels().list(
+            part="snippet,statistics",
+            mine=True
+        )
+    
+    response = request.execute()
+    return response.get('items', [])
+
 def get_channel_info(service, channel_id=None):
     """Get channel information from YouTube API"""
     try:
-        if channel_id:
-            request = service.channels().list(
-                part="snippet,statistics",
-                id=channel_id
-            )
-        else:
-            request = service.channels().list(
-                part="snippet,statistics",
-                mine=True
-            )
-        
-        response = request.execute()
-        return response.get('items', [])
+        # Without a token there is no safe key for the shared cache, so call the API directly
+        fetch = _fetch_channel_info if _service_token(service) else _fetch_channel_info.__wrapped__
+        return fetch(service, channel_id)
     except Exception as e:
         st.error(f"Error fetching channel info: {e}")
         return []
@@ -473,6 +944,9 @@ def create_live_stream(service, title, description, scheduled_start_time, tags=N
         )
         bind_response = bind_request.execute()
         
+        # The new broadcast must show up in "View Existing Streams"
+        _fetch_existing_broadcasts.clear()
+        
         return {
             "stream_key": stream_response['cdn']['ingestionInfo']['streamName'],
             "stream_url": stream_response['cdn']['ingestionInfo']['ingestionAddress'],
@@ -486,21 +960,44 @@ def create_live_stream(service, title, description, scheduled_start_time, tags=N
         st.error(f"Error creating live stream: {e}")
         return None
 
+@st.cache_data(ttl=30, show_spinner=False, hash_funcs={Resource: _service_cache_key})
+def _fetch_existing_broadcasts(service, max_results=10):
+    """Fetch existing live broadcasts from YouTube API, cached for 30 seconds"""
+    request = service.liveBroadcasts().list(
+        part="snippet,status,contentDetails",
+        mine=True,
+        maxResults=max_results,
+        broadcastStatus="all"
+    )
+    response = request.execute()
+    return response.get('items', [])
+
 def get_existing_broadcasts(service, max_results=10):
     """Get existing live broadcasts"""
     try:
-        request = service.liveBroadcasts().list(
-            part="snippet,status,contentDetails",
-            mine=True,
-            maxResults=max_results,
-            broadcastStatus="all"
-        )
-        response = request.execute()
-        return response.get('items', [])
+        fetch = _fetch_existing_broadcasts if _service_token(service) else _fetch_existing_broadcasts.__wrapped__
+        return fetch(service, max_results)
     except Exception as e:
         st.error(f"Error getting existing broadcasts: {e}")
         return []
 
+@st.cache_data(ttl=30, show_spinner=False)
+def _broadcast_rows(broadcasts):
+    """Flatten broadcasts into display rows with their URLs and button keys precomputed"""
+    return [
+        {
+            'title': b['snippet']['title'],
+            'status': b['status']['lifeCycleStatus'],
+            'privacy': b['status']['privacyStatus'],
+            'created': b['snippet']['publishedAt'][:10],
+            'bid': b['id'],
+            'watch': f"https://www.youtube.com/watch?v={b['id']}",
+            'studio': f"https://studio.youtube.com/video/{b['id']}/livestreaming",
+            'key': f"use_broadcast_{i}"
+        }
+        for i, b in enumerate(broadcasts)
+    ]
+
 def get_broadcast_stream_key(service, broadcast_id):
     """Get stream key for existing broadcast"""
     try:
@@ -539,7 +1036,26 @@ def get_broadcast_stream_key(service, broadcast_id):
         st.error(f"Error getting broadcast stream key: {e}")
         return None
 
-def run_ffmpeg(video_path, stream_key, is_shorts, log_callback, rtmp_url=None, session_id=None):
+def _format_progress(fields):
+    """Format one FFmpeg -progress block as a single log line"""
+    def get(key):
+        return fields.get(key, b"N/A").decode('utf-8', 'replace')
+    return (
+        f"frame={get(b'frame')} fps={get(b'fps')} bitrate={get(b'bitrate')} "
+        f"out_time={get(b'out_time')} speed={get(b'speed')}"
+    )
+
+def _last_log_line(f):
+    """Return the last non-empty line of an open FFmpeg log file"""
+    try:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = [line.strip() for line in f.read().splitlines() if line.strip()]
+        return lines[-1].decode('utf-8', 'replace') if lines else "no output"
+    except OSError:
+        return "no output"
+
+def run_ffmpeg(video_path, stream_key, is_shorts, log_callback, rtmp_url=None, session_id=None, proc_slot=None):
     """Run FFmpeg for streaming with enhanced logging"""
     output_url = rtmp_url or f"rtmp://a.rtmp.youtube.com/live2/{stream_key}"
     scale = "-vf scale=720:1280" if is_shorts else ""
@@ -553,6 +1069,8 @@ def run_ffmpeg(video_path, stream_key, is_shorts, log_callback, rtmp_url=None, s
     ]
     if scale:
         cmd += scale.split()
+    # Structured key=value progress goes to stdout; free-form messages go to a temporary file
+    cmd += ["-progress", "pipe:1", "-nostats"]
     cmd.append(output_url)
     
     start_msg = f"🚀 Starting FFmpeg: {' '.join(cmd[:8])}... [RTMP URL hidden for security]"
@@ -560,18 +1078,67 @@ def run_ffmpeg(video_path, stream_key, is_shorts, log_callback, rtmp_url=None, s
     if session_id:
         log_to_database(session_id, "INFO", start_msg, video_path)
     
+    # FFmpeg output is read on one thread and written to database by the shared flusher,
+    # so a slow database write never blocks the pipe FFmpeg is writing into. Rows carry
+    # their own timestamps, so the queries still order them correctly.
+    # Anonymous temp file: private to this run and removed by the OS once closed
+    ffmpeg_log = tempfile.TemporaryFile()
+    log_queue = _log_queue()
+    dropped = 0
+    
     try:
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-        for line in process.stdout:
-            log_callback(line.strip())
-            if session_id:
-                log_to_database(session_id, "FFMPEG", line.strip(), video_path)
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=ffmpeg_log, bufsize=1 << 16)
+        if proc_slot:
+            proc_slot.set(process)
+        
+        def read_progress():
+            nonlocal dropped
+            last_progress = 0.0
+            fields = {}
+            for raw in process.stdout:
+                key, _, value = raw.strip().partition(b"=")
+                if key != b"progress":
+                    fields[key] = value
+                    continue
+                # "progress=..." closes a block; keep at most one block per second
+                now = time.monotonic()
+                if now - last_progress < 1.0:
+                    fields = {}
+                    continue
+                last_progress = now
+                line = _format_progress(fields)
+                fields = {}
+                log_callback(line)
+                if session_id:
+                    try:
+                        log_queue.put_nowait((time.time(), session_id, "FFMPEG", line, video_path, None, None))
+                    except queue.Full:
+                        dropped += 1
+        
+        reader = threading.Thread(target=read_progress, daemon=True)
+        reader.start()
         process.wait()
+        reader.join()
         
-        end_msg = "✅ Streaming completed successfully"
-        log_callback(end_msg)
-        if session_id:
-            log_to_database(session_id, "INFO", end_msg, video_path)
+        if dropped and session_id:
+            log_to_database(session_id, "INFO", f"⚠️ Dropped {dropped} FFmpeg log lines while the database was busy", video_path)
+        
+        if proc_slot and proc_slot.stopped:
+            # Terminated from Stop Streaming (SIGTERM, or exit code 255 from FFmpeg's handler)
+            stop_msg = "⏸️ FFmpeg stopped by user"
+            log_callback(stop_msg)
+            if session_id:
+                log_to_database(session_id, "INFO", stop_msg, video_path)
+        elif process.returncode:
+            error_msg = f"❌ FFmpeg exited with code {process.returncode}: {_last_log_line(ffmpeg_log)}"
+            log_callback(error_msg)
+            if session_id:
+                log_to_database(session_id, "ERROR", error_msg, video_path)
+        else:
+            end_msg = "✅ Streaming completed successfully"
+            log_callback(end_msg)
+            if session_id:
+                log_to_database(session_id, "INFO", end_msg, video_path)
             
     except Exception as e:
         error_msg = f"❌ FFmpeg Error: {e}"
@@ -579,11 +1146,49 @@ def run_ffmpeg(video_path, stream_key, is_shorts, log_callback, rtmp_url=None, s
         if session_id:
             log_to_database(session_id, "ERROR", error_msg, video_path)
     finally:
+        ffmpeg_log.close()
         final_msg = "⏹️ Streaming session ended"
         log_callback(final_msg)
         if session_id:
             log_to_database(session_id, "INFO", final_msg, video_path)
 
+def _terminate(proc):
+    """Terminate a process, killing it if it does not exit within 5 seconds"""
+    if proc and proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+class ProcessSlot:
+    """Holds the FFmpeg process started on the streaming thread so the script thread can stop it"""
+    
+    def __init__(self):
+        self.proc = None
+        self.stopped = False
+        self._lock = threading.Lock()
+    
+    def set(self, proc):
+        with self._lock:
+            self.proc = proc
+            stopped = self.stopped
+        # Stop was pressed before FFmpeg started
+        if stopped:
+            _terminate(proc)
+    
+    def stop(self):
+        with self._lock:
+            self.stopped = True
+            proc = self.proc
+        _terminate(proc)
+
+def _cleanup_stream(proc_slot):
+    """Stop this session's FFmpeg process and remove the temporary video"""
+    if proc_slot:
+        proc_slot.stop()
+    Path("temp_video.mp4").unlink(missing_ok=True)
+
 def auto_process_auth_code():
     """Automatically process authorization code from URL"""
     # Check URL parameters
@@ -645,24 +1250,37 @@ def auto_process_auth_code():
             else:
                 st.error("❌ OAuth configuration not found. Please upload OAuth JSON first.")
 
+# Read-only so callers cannot mutate the shared mapping
+YOUTUBE_CATEGORIES = types.MappingProxyType({
+    "1": "Film & Animation",
+    "2": "Autos & Vehicles", 
+    "10": "Music",
+    "15": "Pets & Animals",
+    "17": "Sports",
+    "19": "Travel & Events",
+    "20": "Gaming",
+    "22": "People & Blogs",
+    "23": "Comedy",
+    "24": "Entertainment",
+    "25": "News & Politics",
+    "26": "Howto & Style",
+    "27": "Education",
+    "28": "Science & Technology"
+})
+
+# Reverse index: category name -> id
+YOUTUBE_CATEGORY_IDS = types.MappingProxyType({name: cid for cid, name in YOUTUBE_CATEGORIES.items()})
+
 def get_youtube_categories():
     """Get YouTube video categories"""
-    return {
-        "1": "Film & Animation",
-        "2": "Autos & Vehicles", 
-        "10": "Music",
-        "15": "Pets & Animals",
-        "17": "Sports",
-        "19": "Travel & Events",
-        "20": "Gaming",
-        "22": "People & Blogs",
-        "23": "Comedy",
-        "24": "Entertainment",
-        "25": "News & Politics",
-        "26": "Howto & Style",
-        "27": "Education",
-        "28": "Science & Technology"
-    }
+    return YOUTUBE_CATEGORIES
+
+def parse_stream_tags(tags_input):
+    """Split the comma-separated stream tags, re-parsing only when the text changes"""
+    if st.session_state.get('_tags_raw') != tags_input:
+        st.session_state['_tags_raw'] = tags_input
+        st.session_state['parsed_tags'] = [tag.strip() for tag in tags_input.split(",") if tag.strip()] if tags_input else []
+    return st.session_state['parsed_tags']
 
 # Fungsi untuk auto start streaming
 def auto_start_streaming(video_path, stream_key, is_shorts=False, custom_rtmp=None, session_id=None):
@@ -674,20 +1292,17 @@ def auto_start_streaming(video_path, stream_key, is_shorts=False, custom_rtmp=No
     # Set session state untuk streaming
     st.session_state['streaming'] = True
     st.session_state['stream_start_time'] = datetime.now()
-    st.session_state['live_logs'] = []
+    st.session_state['live_logs'] = LogRing()
+    # Bound method of the ring itself: O(1) append, no session_state lookups per line
+    log_callback = st.session_state['live_logs'].append
     
-    def log_callback(msg):
-        if 'live_logs' not in st.session_state:
-            st.session_state['live_logs'] = []
-        st.session_state['live_logs'].append(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
-        # Keep only last 100 logs in memory
-        if len(st.session_state['live_logs']) > 100:
-            st.session_state['live_logs'] = st.session_state['live_logs'][-100:]
+    # The streaming thread has no script context, so it fills in a slot created here
+    proc_slot = st.session_state['ffmpeg_proc'] = ProcessSlot()
     
     # Jalankan FFmpeg di thread terpisah
     st.session_state['ffmpeg_thread'] = threading.Thread(
         target=run_ffmpeg, 
-        args=(video_path, stream_key, is_shorts, log_callback, custom_rtmp or None, session_id), 
+        args=(video_path, stream_key, is_shorts, log_callback, custom_rtmp or None, session_id, proc_slot), 
         daemon=True
     )
     st.session_state['ffmpeg_thread'].start()
@@ -746,6 +1361,16 @@ def auto_create_live_broadcast(service, use_custom_settings=True, custom_setting
         log_to_database(session_id, "ERROR", error_msg)
         return None
 
+def render_live_logs():
+    """Render the most recent live log lines"""
+    if 'live_logs' in st.session_state and st.session_state['live_logs']:
+        # Show last 50 live logs
+        recent_logs = st.session_state['live_logs'].tail(50)
+        logs_text = "\n".join(recent_logs)
+        st.text_area("Live Logs", logs_text, height=300, disabled=True)
+    else:
+        st.info("No live logs available. Start streaming to see real-time logs.")
+
 def main():
     # Page configuration must be the first Streamlit command
     st.set_page_config(
@@ -754,15 +1379,16 @@ def main():
         layout="wide"
     )
     
-    # Initialize database
-    init_database()
+    # Initialize database (once per process; retried on the next rerun if it failed)
+    if _ensure_schema() is None:
+        _ensure_schema.clear()
     
     # Initialize session state
     if 'session_id' not in st.session_state:
         st.session_state['session_id'] = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     
     if 'live_logs' not in st.session_state:
-        st.session_state['live_logs'] = []
+        st.session_state['live_logs'] = LogRing()
     
     st.title("🎥 Advanced YouTube Live Streaming Platform")
     st.markdown("---")
@@ -792,7 +1418,7 @@ def main():
                 with col2:
                     if st.button("🔑 Use", key=f"use_{channel['name']}"):
                         # Load this channel's authentication
-                        service = create_youtube_service(channel['auth'])
+                        service = create_youtube_service(msgpack.unpackb(channel['auth_data'], raw=False))
                         if service:
                             # Verify the authentication is still valid
                             channels = get_channel_info(service)
@@ -905,6 +1531,11 @@ def main():
                 is_valid, message = validate_channel_config(config)
                 if is_valid:
                     st.success("✅ Valid configuration loaded")
+                    if st.session_state.get('channel_config') != config:
+                        # Persist channels that carry credentials, once per new config
+                        auth_channels = [ch for ch in config['channels'] if 'auth' in ch]
+                        if auth_channels:
+                            save_channels_bulk(auth_channels)
                     st.session_state['channel_config'] = config
                 else:
                     st.error(f"❌ Invalid configuration: {message}")
@@ -920,20 +1551,17 @@ def main():
         
         with col_log2:
             if st.button("🗑️ Clear Session Logs"):
-                st.session_state['live_logs'] = []
+                # Clear in place so a running stream keeps appending to the same ring
+                st.session_state['live_logs'].clear()
                 st.success("Logs cleared!")
         
-        # Export logs
-        if st.button("📥 Export All Logs"):
-            all_logs = get_logs_from_database(limit=1000)
-            if all_logs:
-                logs_text = "\n".join([f"[{log[0]}] {log[1]}: {log[2]}" for log in all_logs])
-                st.download_button(
-                    label="💾 Download Logs",
-                    data=logs_text,
-                    file_name=f"streaming_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                    mime="text/plain"
-                )
+        # Export logs (the callable defers the query until the button is clicked)
+        st.download_button(
+            label="📥 Download All Logs",
+            data=_build_export_blob,
+            file_name=f"streaming_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+            mime="text/plain"
+        )
     
     # Main content area
     col1, col2 = st.columns([2, 1])
@@ -942,7 +1570,7 @@ def main():
         st.header("🎥 Video & Streaming Setup")
         
         # Video selection
-        video_files = [f for f in os.listdir('.') if f.endswith(('.mp4', '.flv', '.avi', '.mov', '.mkv'))]
+        video_files = list_video_files()
         
         if video_files:
             st.write("📁 Available videos:")
@@ -953,13 +1581,18 @@ def main():
         
         # Video upload
         uploaded_file = st.file_uploader("Or upload new video", type=['mp4', '.flv', '.avi', '.mov', '.mkv'])
+        if AIOFile is not None and sys.platform.startswith('linux'):
+            st.checkbox("⚡ Async upload writes (aiofile)", key="use_aio_upload")
         
         if uploaded_file:
-            with open(uploaded_file.name, "wb") as f:
-                f.write(uploaded_file.read())
+            # The uploader keeps returning the file on every rerun; write it once per upload
+            if st.session_state.get('saved_upload_id') != uploaded_file.file_id:
+                save_uploaded_file(uploaded_file, uploaded_file.name)
+                list_video_files.clear()
+                st.session_state['saved_upload_id'] = uploaded_file.file_id
+                log_to_database(st.session_state['session_id'], "INFO", f"Video uploaded: {uploaded_file.name}")
             st.success("✅ Video uploaded successfully!")
             video_path = uploaded_file.name
-            log_to_database(st.session_state['session_id'], "INFO", f"Video uploaded: {uploaded_file.name}")
         elif selected_video:
             video_path = selected_video
         else:
@@ -1005,9 +1638,8 @@ def main():
                     
                     with col_set2:
                         categories = get_youtube_categories()
-                        category_names = list(categories.values())
-                        selected_category_name = st.selectbox("📂 Category", category_names, index=category_names.index("Gaming"), key="auto_category")
-                        auto_category_id = [k for k, v in categories.items() if v == selected_category_name][0]
+                        category_ids = list(categories)
+                        auto_category_id = st.selectbox("📂 Category", category_ids, index=category_ids.index(YOUTUBE_CATEGORY_IDS["Gaming"]), format_func=categories.get, key="auto_category")
                         
                         auto_schedule_type = st.selectbox("⏰ Schedule", ["📍 Simpan sebagai Draft", "🔴 Publish Sekarang"], key="auto_schedule")
                     
@@ -1137,7 +1769,7 @@ def main():
                     stream_title = st.session_state.get('stream_title_input', 'Live Stream')
                     stream_description = st.session_state.get('stream_description_input', 'Live streaming session')
                     tags_input = st.session_state.get('tags_input', '')
-                    tags = [tag.strip() for tag in tags_input.split(",") if tag.strip()] if tags_input else []
+                    tags = parse_stream_tags(tags_input)
                     category_id = st.session_state.get('category_id', "20")
                     privacy_status = st.session_state.get('privacy_status', "public")
                     made_for_kids = st.session_state.get('made_for_kids', False)
@@ -1208,36 +1840,33 @@ def main():
                             if broadcasts:
                                 st.success(f"📺 Found {len(broadcasts)} existing broadcasts:")
                                 
-                                for i, broadcast in enumerate(broadcasts):
-                                    with st.expander(f"🎬 {broadcast['snippet']['title']} - {broadcast['status']['lifeCycleStatus']}"):
+                                for row in _broadcast_rows(broadcasts):
+                                    with st.expander(f"🎬 {row['title']} - {row['status']}"):
                                         col_bc1, col_bc2 = st.columns(2)
                                         
                                         with col_bc1:
-                                            st.write(f"**Title:** {broadcast['snippet']['title']}")
-                                            st.write(f"**Status:** {broadcast['status']['lifeCycleStatus']}")
-                                            st.write(f"**Privacy:** {broadcast['status']['privacyStatus']}")
-                                            st.write(f"**Created:** {broadcast['snippet']['publishedAt'][:10]}")
+                                            st.write(f"**Title:** {row['title']}")
+                                            st.write(f"**Status:** {row['status']}")
+                                            st.write(f"**Privacy:** {row['privacy']}")
+                                            st.write(f"**Created:** {row['created']}")
                                         
                                         with col_bc2:
-                                            watch_url = f"https://www.youtube.com/watch?v={broadcast['id']}"
-                                            studio_url = f"https://studio.youtube.com/video/{broadcast['id']}/livestreaming"
+                                            st.markdown(f"**Watch:** [Open]({row['watch']})")
+                                            st.markdown(f"**Studio:** [Manage]({row['studio']})")
                                             
-                                            st.markdown(f"**Watch:** [Open]({watch_url})")
-                                            st.markdown(f"**Studio:** [Manage]({studio_url})")
-                                            
-                                            if st.button(f"🔑 Use This Stream", key=f"use_broadcast_{i}"):
+                                            if st.button(f"🔑 Use This Stream", key=row['key']):
                                                 # Get stream key for this broadcast
-                                                stream_info = get_broadcast_stream_key(service, broadcast['id'])
+                                                stream_info = get_broadcast_stream_key(service, row['bid'])
                                                 if stream_info:
                                                     st.session_state['current_stream_key'] = stream_info['stream_key']
                                                     st.session_state['live_broadcast_info'] = {
-                                                        'broadcast_id': broadcast['id'],
-                                                        'watch_url': watch_url,
-                                                        'studio_url': studio_url,
+                                                        'broadcast_id': row['bid'],
+                                                        'watch_url': row['watch'],
+                                                        'studio_url': row['studio'],
                                                         'stream_key': stream_info['stream_key'],
                                                         'stream_url': stream_info['stream_url']
                                                     }
-                                                    st.success(f"✅ Using stream: {broadcast['snippet']['title']}")
+                                                    st.success(f"✅ Using stream: {row['title']}")
                                                     st.rerun()
                                                 else:
                                                     st.error("❌ Could not get stream key for this broadcast")
@@ -1310,9 +1939,8 @@ def main():
         
         with col_basic2:
             categories = get_youtube_categories()
-            category_names = list(categories.values())
-            selected_category_name = st.selectbox("📂 Category", category_names, index=category_names.index("Gaming"))
-            category_id = [k for k, v in categories.items() if v == selected_category_name][0]
+            category_ids = list(categories)
+            category_id = st.selectbox("📂 Category", category_ids, index=category_ids.index(YOUTUBE_CATEGORY_IDS["Gaming"]), format_func=categories.get)
             st.session_state['category_id'] = category_id
             
             # Stream schedule type
@@ -1329,7 +1957,7 @@ def main():
         tags_input = st.text_input("🏷️ Tags (comma separated)", 
                                  placeholder="gaming, live, stream, youtube",
                                  key="tags_input")
-        tags = [tag.strip() for tag in tags_input.split(",") if tag.strip()] if tags_input else []
+        tags = parse_stream_tags(tags_input)
         
         if tags:
             st.write("**Tags:**", ", ".join(tags))
@@ -1404,19 +2032,14 @@ def main():
                 # Start streaming
                 st.session_state['streaming'] = True
                 st.session_state['stream_start_time'] = datetime.now()
-                st.session_state['live_logs'] = []
+                st.session_state['live_logs'] = LogRing()
+                log_callback = st.session_state['live_logs'].append
                 
-                def log_callback(msg):
-                    if 'live_logs' not in st.session_state:
-                        st.session_state['live_logs'] = []
-                    st.session_state['live_logs'].append(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}")
-                    # Keep only last 100 logs in memory
-                    if len(st.session_state['live_logs']) > 100:
-                        st.session_state['live_logs'] = st.session_state['live_logs'][-100:]
+                proc_slot = st.session_state['ffmpeg_proc'] = ProcessSlot()
                 
                 st.session_state['ffmpeg_thread'] = threading.Thread(
                     target=run_ffmpeg, 
-                    args=(video_path, stream_key, is_shorts, log_callback, custom_rtmp or None, st.session_state['session_id']), 
+                    args=(video_path, stream_key, is_shorts, log_callback, custom_rtmp or None, st.session_state['session_id'], proc_slot), 
                     daemon=True
                 )
                 st.session_state['ffmpeg_thread'].start()
@@ -1428,9 +2051,12 @@ def main():
             st.session_state['streaming'] = False
             if 'stream_start_time' in st.session_state:
                 del st.session_state['stream_start_time']
-            os.system("pkill ffmpeg")
-            if os.path.exists("temp_video.mp4"):
-                os.remove("temp_video.mp4")
+            # Stop this session's FFmpeg process and clean up in the background
+            threading.Thread(
+                target=_cleanup_stream,
+                args=(st.session_state.pop('ffmpeg_proc', None),),
+                daemon=True
+            ).start()
             st.warning("⏸️ Streaming stopped!")
             log_to_database(st.session_state['session_id'], "INFO", "Streaming stopped by user")
             st.rerun()
@@ -1447,12 +2073,14 @@ def main():
         # Statistics
         st.subheader("📈 Statistics")
         
-        # Session stats
-        session_logs = get_logs_from_database(st.session_state['session_id'], 50)
-        st.metric("Session Logs", len(session_logs))
+        # Snapshot the live log count once; it is reused by the metrics and the history tab
+        live_log_count = len(st.session_state['live_logs'])
         
-        if 'live_logs' in st.session_state:
-            st.metric("Live Log Entries", len(st.session_state['live_logs']))
+        # Session stats
+        # One query serves both the metric (first 50) and the Session History tab (first 20)
+        session_logs = _cached_session_logs(st.session_state['session_id'], 100, live_log_count)
+        st.metric("Session Logs", len(session_logs[:50]))
+        st.metric("Live Log Entries", live_log_count)
         
         # Channel info display
         if 'channel_config' in st.session_state:
@@ -1482,30 +2110,22 @@ def main():
         
         # Live logs container
         log_container = st.container()
-        with log_container:
-            if 'live_logs' in st.session_state and st.session_state['live_logs']:
-                # Show last 50 live logs
-                recent_logs = st.session_state['live_logs'][-50:]
-                logs_text = "\n".join(recent_logs)
-                st.text_area("Live Logs", logs_text, height=300, disabled=True, key="live_logs_display")
-            else:
-                st.info("No live logs available. Start streaming to see real-time logs.")
         
         # Auto-refresh toggle
         auto_refresh = st.checkbox("🔄 Auto-refresh logs", value=streaming)
         
-        if auto_refresh and streaming:
-            time.sleep(2)
-            st.rerun()
+        # Only the log fragment reruns on the refresh timer, not the whole page
+        with log_container:
+            st.fragment(run_every=2 if auto_refresh and streaming else None)(render_live_logs)()
     
     with tab2:
         st.subheader("Current Session History")
         
-        session_logs = get_logs_from_database(st.session_state['session_id'], 100)
         if session_logs:
             # Create a formatted display
             for log in session_logs[:20]:  # Show last 20 session logs
                 timestamp, log_type, message, video_file, channel_name = log
+                timestamp = format_log_timestamp(timestamp)
                 
                 # Color code by log type
                 if log_type == "ERROR":
@@ -1531,25 +2151,14 @@ def main():
         with col_filter2:
             log_type_filter = st.selectbox("Filter by type", ["All", "INFO", "ERROR", "FFMPEG"])
         
-        all_logs = get_logs_from_database(limit=log_limit)
+        all_logs = get_logs_from_database(limit=log_limit, log_type=None if log_type_filter == "All" else log_type_filter)
         
         if all_logs:
-            # Filter by type if selected
-            if log_type_filter != "All":
-                all_logs = [log for log in all_logs if log[1] == log_type_filter]
+            df = pd.DataFrame(all_logs, columns=['timestamp', 'type', 'message', 'video_file', 'channel_name'])
             
-            # Display in expandable sections
-            for i, log in enumerate(all_logs[:50]):  # Limit display to 50 for performance
-                timestamp, log_type, message, video_file, channel_name = log
-                
-                with st.expander(f"{log_type} - {timestamp} - {message[:50]}..."):
-                    st.write(f"**Timestamp:** {timestamp}")
-                    st.write(f"**Type:** {log_type}")
-                    st.write(f"**Message:** {message}")
-                    if video_file:
-                        st.write(f"**Video File:** {video_file}")
-                    if channel_name:
-                        st.write(f"**Channel:** {channel_name}")
+            # One table widget instead of an expander per row; limit display to 50
+            df = df.head(50).assign(timestamp=lambda d: d['timestamp'].map(format_log_timestamp))
+            st.dataframe(df, width="stretch", hide_index=True)
         else:
             st.info("No historical logs available.")
 